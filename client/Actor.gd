@@ -17,9 +17,25 @@ var rubber_band_radius: float = 200
 
 var speed: float = 70.0
 
+# Current move event from the server, extrapolated every frame until the server stops us
+var moving: bool = false
+var _move_start: Vector2
+var _move_target: Vector2
+var _move_speed: float
+var _move_start_time: float
+
 func _ready():
 	update(initial_data)
 
+func reuse(init_data: Dictionary):
+	# Reset a pooled actor so it initialises like a fresh instance when added back to the tree
+	initialised_position = false
+	moving = false
+	velocity = Vector2.ZERO
+	data = {}
+	request_ready()
+	return init(init_data)
+
 func update(new_model: Dictionary):
 	.update(new_model)
 	
@@ -32,12 +48,15 @@ func update(new_model: Dictionary):
 		
 		if ientity.has("x") and ientity.has("y"):
 			server_position = Vector2(float(ientity["x"]), float(ientity["y"]))
+			moving = false
+			
+			# A stop or correction from the server: the player walks to where the server says they are
+			if is_player:
+				_player_target = server_position
 			
 			if not initialised_position:
 				initialised_position = true
 				body.position = server_position
-				if is_player:
-					_player_target = server_position
 			elif (body.position - server_position).length() > rubber_band_radius:
 				# Rubber band if body position too far away from server position
 				body.position = server_position
@@ -51,7 +70,23 @@ func update(new_model: Dictionary):
 				if label:
 					label.text = actor_name
 
+func start_move(start: Vector2, target: Vector2, move_speed: float, start_time: float):
+	_move_start = start
+	_move_target = target
+	_move_speed = move_speed
+	_move_start_time = start_time
+	moving = true
+	
+	# The server may route us around walls, so follow its waypoints rather than the point we clicked
+	if is_player:
+		_player_target = target
+
 func _physics_process(delta):	
+	if moving:
+		var elapsed: float = OS.get_ticks_msec() / 1000.0 - _move_start_time
+		var travel: float = clamp(elapsed * _move_speed, 0.0, _move_start.distance_to(_move_target))
+		server_position = _move_start.move_toward(_move_target, travel)
+	
 	var target: Vector2
 	if is_player:
 		target = _player_target
@@ -13,6 +13,7 @@ onready var avatar_ok: Button = get_node("CanvasLayer/Panel/VBoxContainer/HBoxCo
 onready var avatar_right: Button = get_node("CanvasLayer/Panel/VBoxContainer/HBoxContainer/Button_Right")
 
 var avatar_id = 0
+var _queue_label: Label = null
 
 signal login(username, password)
 signal register(username, password)
@@ -50,5 +51,18 @@ func _prev_avatar():
 func _update_sprite():
 	avatar_sprite.set_region_rect(Rect2(368, avatar_id * 48, 64, 48))
 
+func show_queue_position(position: int):
+	# Shown while the server is admitting other players first
+	if not _queue_label:
+		_queue_label = Label.new()
+		_queue_label.align = Label.ALIGN_CENTER
+		get_node("CanvasLayer/VBoxContainer").add_child(_queue_label)
+	_queue_label.text = "Server busy, you are number %d in the queue" % position
+	_queue_label.visible = true
+
+func hide_queue_position():
+	if _queue_label:
+		_queue_label.visible = false
+
 func _register():
 	emit_signal("register", username_field.text, password_field.text, avatar_id)
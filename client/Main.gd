@@ -6,6 +6,9 @@ const Packet = preload("res://packet.gd")
 const Chatbox = preload("res://Chatbox.tscn")
 const Actor = preload("res://Actor.tscn")
 
+# Set to true to log every packet and model update (too slow to leave on at 20 Hz)
+const DEBUG_LOG: bool = false
+
 onready var _network_client = NetworkClient.new()
 onready var _login_screen = get_node("Login")
 var _chatbox = null
@@ -16,6 +19,18 @@ var _player_actor = null
 var _world_items: Dictionary = {}
 var _inventory: Array = []
 
+# Hidden nodes kept around for reuse so spawn/despawn bursts don't allocate
+var _actor_pool: Array = []
+var _item_pool: Array = []
+var _pickup_label: Label = null
+var _pickup_tween: Tween = null
+
+# Smallest (local time - server time) seen so far, used to place server timestamps on our clock
+var _clock_offset = null
+
+# Model type -> FuncRef with signature `_update_x(model_id: int, model_data: Dictionary)`
+var _model_updaters: Dictionary = {}
+
 
 func _ready():
 	_network_client.connect("connected", self, "_handle_client_connected")
@@ -28,22 +43,32 @@ func _ready():
 	_login_screen.connect("login", self, "_handle_login_button")
 	_login_screen.connect("register", self, "_handle_register_button")
 	state = null
+	
+	_model_updaters["Actor"] = funcref(self, "_update_actor")
 
 func LOGIN(p):
 	match p.action:
 		"Ok":
+			_login_screen.hide_queue_position()
 			_enter_game()
 		"Deny":
+			_login_screen.hide_queue_position()
 			var reason: String = p.payloads[0]
 			OS.alert(reason)
+		"Queue":
+			_login_screen.show_queue_position(int(p.payloads[0]))
 
 func REGISTER(p):
 	match p.action:
 		"Ok":
+			_login_screen.hide_queue_position()
 			OS.alert("Registration successful")
 		"Deny":
+			_login_screen.hide_queue_position()
 			var reason: String = p.payloads[0]
 			OS.alert(reason)
+		"Queue":
+			_login_screen.show_queue_position(int(p.payloads[0]))
 
 func PLAY(p):
 	match p.action:
@@ -61,6 +86,15 @@ func PLAY(p):
 			_chatbox.add_message(null, actor.actor_name + " has disconnected.")
 			remove_child(actor)
 			_actors.erase(actor_id)
+			_actor_pool.append(actor)
+			
+		"Move":
+			var actor_id: int = p.payloads[0]
+			if actor_id in _actors:
+				var start = Vector2(float(p.payloads[1]), float(p.payloads[2]))
+				var target = Vector2(float(p.payloads[3]), float(p.payloads[4]))
+				var speed: float = p.payloads[5]
+				_actors[actor_id].start_move(start, target, speed, _server_to_local_time(p.payloads[6]))
 			
 		"ItemSpawn":
 			var item_data: Dictionary = p.payloads[0]
@@ -89,14 +123,13 @@ func _handle_register_button(username: String, password: String, avatar_id: int)
 
 func _update_models(model_data: Dictionary):
 	"""
-	Runs a function with signature 
-	`_update_x(model_id: int, model_data: Dictionary)` where `x` is the name 
-	of a model (e.g. `_update_actor`).
+	Runs the function registered in `_model_updaters` for the model's type 
+	(e.g. `_update_actor` for an Actor).
 	"""
-	print("Received model data: %s" % JSON.print(model_data))
+	if DEBUG_LOG:
+		print("Received model data: %s" % JSON.print(model_data))
 	var model_id: int = model_data["id"]
-	var func_name: String = "_update_" + model_data["model_type"].to_lower()
-	var f: FuncRef = funcref(self, func_name)
+	var f: FuncRef = _model_updaters[model_data["model_type"]]
 	f.call_func(model_id, model_data)
 
 func _update_actor(model_id: int, model_data: Dictionary):
@@ -112,12 +145,21 @@ func _update_actor(model_id: int, model_data: Dictionary):
 			_player_actor = Actor.instance().init(model_data)
 			_player_actor.is_player = true
 			new_actor = _player_actor
+		elif _actor_pool.size() > 0:
+			new_actor = _actor_pool.pop_back().reuse(model_data)
 		else:
 			new_actor = Actor.instance().init(model_data)
 		
 		_actors[model_id] = new_actor
 		add_child(new_actor)
 
+func _server_to_local_time(server_time: float) -> float:
+	# Latency only ever makes the offset look bigger, so the smallest one is the best estimate
+	var now: float = OS.get_ticks_msec() / 1000.0
+	if _clock_offset == null or now - server_time < _clock_offset:
+		_clock_offset = now - server_time
+	return server_time + _clock_offset
+
 func _enter_game():
 	state = funcref(self, "PLAY")
 
@@ -144,13 +186,10 @@ func _handle_client_disconnected(was_clean: bool):
 
 
 func _handle_network_data(data: String):
-	print("Received server data: ", data)
+	if DEBUG_LOG:
+		print("Received server data: ", data)
 	var action_payloads: Array = Packet.json_to_action_payloads(data)
 	var p: Packet = Packet.new(action_payloads[0], action_payloads[1])
-	print("Parsed packet action: ", p.action)
-	if p.action == "ItemRemove":
-		print("*** ITEMREMOVE PACKET DETECTED ***")
-		print("Payloads: ", p.payloads)
 	# Pass the packet to our current state
 	state.call_func(p)
 
@@ -159,27 +198,46 @@ func _handle_network_error():
 	OS.alert("There was an error")
 
 func _show_pickup_message(text: String):
-	# Create a temporary label for pickup notification
-	var pickup_label = Label.new()
-	pickup_label.text = text
-	pickup_label.add_color_override("font_color", Color.green)
-	pickup_label.rect_position = Vector2(400, 100)
-	pickup_label.rect_size = Vector2(300, 50)
-	pickup_label.align = Label.ALIGN_CENTER
-	add_child(pickup_label)
+	# The pickup label and its fade tween are created once and reused
+	if not _pickup_label:
+		_pickup_label = Label.new()
+		_pickup_label.add_color_override("font_color", Color.green)
+		_pickup_label.rect_position = Vector2(400, 100)
+		_pickup_label.rect_size = Vector2(300, 50)
+		_pickup_label.align = Label.ALIGN_CENTER
+		add_child(_pickup_label)
+		
+		_pickup_tween = Tween.new()
+		add_child(_pickup_tween)
 	
-	# Create tween to fade out the message
-	var tween = Tween.new()
-	add_child(tween)
-	tween.interpolate_property(pickup_label, "modulate:a", 1.0, 0.0, 2.0)
-	tween.start()
+	_pickup_label.text = text
+	_pickup_label.visible = true
 	
-	# Remove the label after animation
-	yield(tween, "tween_completed")
-	remove_child(pickup_label)
-	pickup_label.queue_free()
-	remove_child(tween)
-	tween.queue_free()
+	# Restart the fade out, even if a previous message is still fading
+	_pickup_tween.remove_all()
+	_pickup_tween.interpolate_property(_pickup_label, "modulate:a", 1.0, 0.0, 2.0)
+	_pickup_tween.start()
+
+func _new_item_node() -> Control:
+	# Colored circle with a name label above it
+	var item_node = Control.new()
+	item_node.rect_size = Vector2(20, 20)
+	
+	var circle = ColorRect.new()
+	circle.name = "Circle"
+	circle.rect_size = Vector2(20, 20)
+	circle.rect_position = Vector2(0, 0)
+	item_node.add_child(circle)
+	
+	var label = Label.new()
+	label.name = "Label"
+	label.rect_position = Vector2(-20, -30)
+	label.rect_size = Vector2(40, 15)
+	label.align = Label.ALIGN_CENTER
+	item_node.add_child(label)
+	
+	add_child(item_node)
+	return item_node
 
 func _spawn_world_item(item_data: Dictionary):
 	var item_id = int(item_data["id"])  # Ensure integer type
@@ -188,18 +246,16 @@ func _spawn_world_item(item_data: Dictionary):
 	var item_name = item_data["item"]["name"]
 	var item_type = item_data["item"]["item_type"]
 	
-	# Create colored circle for item
-	var item_node = Control.new()
-	item_node.rect_size = Vector2(20, 20)
+	var item_node: Control
+	if _item_pool.size() > 0:
+		item_node = _item_pool.pop_back()
+	else:
+		item_node = _new_item_node()
 	item_node.rect_position = Vector2(x - 10, y - 10)
-	item_node.name = "WorldItem_" + str(item_id)
-	
-	# Add circle shape
-	var circle = ColorRect.new()
-	circle.rect_size = Vector2(20, 20)
-	circle.rect_position = Vector2(0, 0)
+	item_node.visible = true
 	
 	# Set different colors based on item type
+	var circle: ColorRect = item_node.get_node("Circle")
 	if item_type == "weapon":
 		circle.color = Color.yellow
 	elif item_type == "potion":
@@ -207,42 +263,41 @@ func _spawn_world_item(item_data: Dictionary):
 	else:
 		circle.color = Color.white
 	
-	item_node.add_child(circle)
-	
-	# Add label
-	var label = Label.new()
+	var label: Label = item_node.get_node("Label")
 	label.text = item_name
-	label.rect_position = Vector2(-20, -30)
-	label.rect_size = Vector2(40, 15)
-	label.align = Label.ALIGN_CENTER
-	item_node.add_child(label)
 	
-	add_child(item_node)
 	_world_items[item_id] = item_node
 	
-	print("Spawned item: ", item_name, " at ", x, ", ", y)
+	if DEBUG_LOG:
+		print("Spawned item: ", item_name, " at ", x, ", ", y)
 
 func _remove_world_item(item_id: int):
 	var id = int(item_id)
 	
 	if _world_items.has(id):
+		# Hide the node and keep it in the tree for the next spawn
 		var item_node = _world_items[id]
 		item_node.visible = false
-		remove_child(item_node)
-		item_node.queue_free()
+		_item_pool.append(item_node)
 		_world_items.erase(id)
-		_show_pickup_message("Item added to inventory!")
 
-var _last_inventory_count = 0
+# Total quantity of the last inventory received, -1 until the first one arrives at login
+var _last_inventory_count = -1
 
 func _update_inventory(inventory_data: Array):
 	_inventory = inventory_data
-	print("Inventory updated: ")
+	if DEBUG_LOG:
+		print("Inventory updated: ")
+		for item in inventory_data:
+			print("  ", item["item"]["name"], " x", item["quantity"])
 	
+	# Items are removed from the world for everyone, so only our own inventory growing means we picked one up
+	var count: int = 0
 	for item in inventory_data:
-		print("  ", item["item"]["name"], " x", item["quantity"])
-	
-	_last_inventory_count = inventory_data.size()
+		count += int(item["quantity"])
+	if _last_inventory_count >= 0 and count > _last_inventory_count:
+		_show_pickup_message("Item added to inventory!")
+	_last_inventory_count = count
 
 func _show_inventory_display():
 	# Request fresh inventory data from server/RDS
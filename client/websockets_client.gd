@@ -2,6 +2,9 @@ extends Node
 
 const Packet = preload("res://packet.gd")
 
+# Set to true to log every packet sent and received
+const DEBUG_LOG: bool = false
+
 signal connected
 signal data
 signal disconnected
@@ -48,7 +51,8 @@ func _connected(proto = ""):
 
 func _on_data():
 	var data: String = _client.get_peer(1).get_packet().get_string_from_utf8()
-	print("Got data from server: ", data)
+	if DEBUG_LOG:
+		print("Got data from server: ", data)
 	emit_signal("data", data)
 
 
@@ -58,4 +62,5 @@ func _process(delta):
 
 func _send_string(string: String) -> void:
 	_client.get_peer(1).put_packet(string.to_utf8())
-	print("Sent string ", string)
+	if DEBUG_LOG:
+		print("Sent string ", string)
@@ -2,26 +2,144 @@ import manage   # This must be at the top
 import sys
 import os
 import protocol
+from server import packet
+import journal
+import profiling
+import pathfinding
 from twisted.python import log
 from twisted.internet import reactor, task, ssl
 from autobahn.twisted.websocket import WebSocketServerFactory
+from autobahn.websocket.compress import PerMessageDeflateOffer, PerMessageDeflateOfferAccept
 
 
 class GameFactory(WebSocketServerFactory):
-    def __init__(self, hostname: str, port: int):
+    # permessage-deflate defaults: messages smaller than the minimum size (e.g. Move events, ~145 bytes) are sent
+    # uncompressed, while login world syncs (~215 byte item spawns) and inventory payloads get compressed.
+    COMPRESSION_WINDOW_BITS: int = 11
+    COMPRESSION_NO_CONTEXT_TAKEOVER: bool = False
+    COMPRESSION_MIN_SIZE: int = 192
+
+    def __init__(self, hostname: str, port: int, compression_window_bits: int = None,
+                 compression_no_context_takeover: bool = None, compression_min_size: int = None):
         self.protocol = protocol.GameServerProtocol
         super().__init__(f"ws://{hostname}:{port}")
 
+        self.compression_window_bits: int = (
+            self.COMPRESSION_WINDOW_BITS if compression_window_bits is None else compression_window_bits
+        )
+        self.compression_no_context_takeover: bool = (
+            self.COMPRESSION_NO_CONTEXT_TAKEOVER if compression_no_context_takeover is None
+            else compression_no_context_takeover
+        )
+        self.compression_min_size: int = (
+            self.COMPRESSION_MIN_SIZE if compression_min_size is None else compression_min_size
+        )
+        # Checked here, since a bad value would otherwise only fail later in every client's handshake
+        if self.compression_window_bits not in PerMessageDeflateOfferAccept.WINDOW_SIZE_PERMISSIBLE_VALUES:
+            raise ValueError(f"WS_COMPRESSION_WINDOW_BITS must be between 9 and 15, got {self.compression_window_bits}")
+        if self.compression_min_size < 0:
+            raise ValueError(f"WS_COMPRESSION_MIN_SIZE can't be negative, got {self.compression_min_size}")
+        self.setProtocolOptions(perMessageCompressionAccept=self._accept_compression)
+
         self.players: set[protocol.GameServerProtocol] = set()
         self.tickrate: int = 20
+        self._tick_count: int = 0
+
+        # Login admission control: at most max_concurrent_logins players are authenticating or receiving their
+        # initial world sync at once, the rest wait in login_queue (insertion ordered) and are told their position
+        self.max_concurrent_logins: int = 10
+        self.login_queue: dict[protocol.GameServerProtocol, packet.Packet] = {}
+        self.logins_in_progress: set[protocol.GameServerProtocol] = set()
+        self.test_items_spawned: bool = False
+
+        # Replay anything a previous run journaled but never folded into the database
+        self.journal = journal.WorldJournal(protocol.config.get('WORLD_JOURNAL_DIR') or 'journal')
+        self.journal.recover()
+        self.journal.compact()
+
+        self.profiler = profiling.TickProfiler()
+
+        # Collision grid from the client's map scene; without it, actors move in straight lines
+        self.collision_grid: pathfinding.CollisionGrid = None
+        scene_path = manage.root / 'client' / 'Main.tscn'
+        if scene_path.exists():
+            self.collision_grid = pathfinding.CollisionGrid.from_tscn(scene_path)
+            print(f"Loaded collision grid with {len(self.collision_grid.walkable)} walkable cells")
+        else:
+            print(f"No map scene at {scene_path}, pathfinding disabled")
 
         tickloop = task.LoopingCall(self.tick)
         tickloop.start(1 / self.tickrate)
 
+        compactloop = task.LoopingCall(self.journal.compact)
+        compactloop.start(5, now=False)
+
+    def _accept_compression(self, offers: list):
+        "Accept the client's first permessage-deflate offer using our window size and context takeover settings"
+        for offer in offers:
+            if isinstance(offer, PerMessageDeflateOffer):
+                window_bits: int = self.compression_window_bits
+                if offer.request_max_window_bits:
+                    window_bits = min(window_bits, offer.request_max_window_bits)
+                return PerMessageDeflateOfferAccept(
+                    offer,
+                    # We can't refuse a client that asks us not to keep context between messages
+                    no_context_takeover=self.compression_no_context_takeover or offer.request_no_context_takeover,
+                    window_bits=window_bits
+                )
+        return None
+
     def tick(self):
+        profile = self.profiler.profile
+        if not profile:
+            self._tick()
+            return
+
+        profile.enable()
+        try:
+            self._tick()
+        finally:
+            profile.disable()
+
+    def _tick(self):
+        self._admit_logins()
         for p in self.players:
             p.tick()
 
+    def queue_login(self, p: protocol.GameServerProtocol, login_packet: packet.Packet):
+        "Admit a Login/Register packet straight away if there is room, otherwise hold it until there is"
+        if p in self.login_queue:
+            self.login_queue[p] = login_packet
+            return
+
+        if not self.login_queue and len(self.logins_in_progress) < self.max_concurrent_logins:
+            self.logins_in_progress.add(p)
+            p.onPacket(p, login_packet, admitted=True)
+            return
+
+        self.login_queue[p] = login_packet
+        p.send_client(packet.QueuePacket(len(self.login_queue)))
+
+    def finish_login(self, p: protocol.GameServerProtocol):
+        self.logins_in_progress.discard(p)
+
+    def forget_login(self, p: protocol.GameServerProtocol):
+        self.login_queue.pop(p, None)
+        self.logins_in_progress.discard(p)
+
+    def _admit_logins(self):
+        while self.login_queue and len(self.logins_in_progress) < self.max_concurrent_logins:
+            p = next(iter(self.login_queue))
+            login_packet = self.login_queue.pop(p)
+            self.logins_in_progress.add(p)
+            p.onPacket(p, login_packet, admitted=True)
+
+        # Let everyone still waiting know where they are once a second
+        self._tick_count += 1
+        if self._tick_count % self.tickrate == 0:
+            for position, p in enumerate(self.login_queue, start=1):
+                p.send_client(packet.QueuePacket(position))
+
     # Override
     def buildProtocol(self, addr):
         p = super().buildProtocol(addr)
@@ -29,13 +147,33 @@ class GameFactory(WebSocketServerFactory):
         return p
 
 
+def int_setting(config: dict, key: str) -> int:
+    "Read an optional integer setting, returning None when unset so the GameFactory default applies"
+    value = config.get(key)
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"{key} must be an integer, got {value!r}")
+
+
 if __name__ == '__main__':
     log.startLogging(sys.stdout)
     
     # Demo mode - HTTP only (no SSL)
     PORT: int = 8081
-    factory = GameFactory('0.0.0.0', PORT)
+    config = protocol.config
+    no_context_takeover = config.get('WS_COMPRESSION_NO_CONTEXT_TAKEOVER')
+    factory = GameFactory(
+        '0.0.0.0', PORT,
+        compression_window_bits=int_setting(config, 'WS_COMPRESSION_WINDOW_BITS'),
+        compression_no_context_takeover=no_context_takeover.lower() in ('1', 'true', 'yes') if no_context_takeover else None,
+        compression_min_size=int_setting(config, 'WS_COMPRESSION_MIN_SIZE')
+    )
     reactor.listenTCP(PORT, factory)
     print("Starting demo server (HTTP) on port 8081")
     
+    factory.profiler.install_signal_handlers()
+    reactor.addSystemEventTrigger('before', 'shutdown', factory.journal.close)
     reactor.run()
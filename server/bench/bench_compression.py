@@ -0,0 +1,68 @@
+"""
+CPU per client versus bytes saved for permessage-deflate settings, using autobahn's own deflate implementation on
+a synthetic session: the login world sync, an inventory, then a minute of movement traffic from other players.
+
+    python server/bench/bench_compression.py [world_items] [seconds]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[2]
+sys.path.append(str(root))
+
+from autobahn.websocket.compress_deflate import PerMessageDeflate
+from server import packet
+
+
+def session(world_items: int, seconds: int) -> list[bytes]:
+    messages: list = [bytes(packet.OkPacket())]
+    for i in range(world_items):
+        messages.append(bytes(packet.ItemSpawnPacket({
+            "id": i, "item": {"id": i % 2 + 1, "name": random.choice(["Iron Sword", "Health Potion"]),
+                              "description": "A sturdy iron sword", "item_type": "weapon", "model_type": "Item"},
+            "x": random.uniform(0, 1280), "y": random.uniform(0, 896), "model_type": "WorldItem",
+        })))
+    messages.append(bytes(packet.InventoryPacket([
+        {"id": i, "actor": 1, "item": {"id": i, "name": f"Item {i}", "description": "Restores health",
+                                       "item_type": "potion", "model_type": "Item"}, "quantity": 3, "model_type": "Inventory"}
+        for i in range(20)
+    ])))
+    # Ten other players starting a move about once a second each
+    for tick in range(seconds * 10):
+        messages.append(bytes(packet.MovePacket(
+            tick % 10, random.uniform(0, 1280), random.uniform(0, 896), random.uniform(0, 1280), random.uniform(0, 896),
+            70, time.time()
+        )))
+    return messages
+
+
+def run(messages: list, window_bits: int, no_context_takeover: bool, min_size: int) -> tuple[int, float]:
+    deflate = PerMessageDeflate(True, no_context_takeover, False, window_bits, 15, 8)
+    sent: int = 0
+    start = time.process_time()
+    for m in messages:
+        if len(m) < min_size:
+            sent += len(m)
+            continue
+        deflate.start_compress_message()
+        sent += len(deflate.compress_message_data(m)) + len(deflate.end_compress_message())
+    return sent, time.process_time() - start
+
+
+def main(world_items: int, seconds: int):
+    messages = session(world_items, seconds)
+    raw: int = sum(len(m) for m in messages)
+    print(f"{len(messages)} messages, {raw} bytes uncompressed per client")
+    print(f"{'window':>6} {'no_ctx':>6} {'min_size':>8} {'bytes':>10} {'saved':>7} {'cpu ms':>8}")
+    for window_bits in (9, 11, 15):
+        for no_context_takeover in (False, True):
+            for min_size in (0, 192, 256):
+                sent, cpu = run(messages, window_bits, no_context_takeover, min_size)
+                print(f"{window_bits:>6} {str(no_context_takeover):>6} {min_size:>8} {sent:>10} "
+                      f"{100 * (1 - sent / raw):>6.1f}% {cpu * 1000:>8.1f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500, int(sys.argv[2]) if len(sys.argv) > 2 else 60)
@@ -0,0 +1,46 @@
+"""
+Startup recovery time of the world journal: load a snapshot of N actor positions and replay a journal tail on top.
+
+    python server/bench/bench_journal_startup.py [entities] [tail_records]
+"""
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[2]
+sys.path.append(str(root))
+sys.path.append(str(root / 'server'))
+
+import django.conf
+django.conf.settings.configure(INSTALLED_APPS=['server'], DATABASES={})
+django.setup()
+
+import journal
+
+
+def main(entities: int, tail: int):
+    with tempfile.TemporaryDirectory() as directory:
+        # Write a snapshot and a journal tail with a throwaway journal that never compacts
+        writer = journal.WorldJournal(directory, snapshot_every=tail + 1)
+        writer.compact = lambda: None
+        writer.recover()
+        for i in range(entities):
+            writer.record_position(i, random.uniform(0, 1280), random.uniform(0, 896))
+        writer.snapshot()
+        for _ in range(tail):
+            writer.record_position(random.randrange(entities), random.uniform(0, 1280), random.uniform(0, 896))
+        writer._file.close()
+
+        start = time.perf_counter()
+        reader = journal.WorldJournal(directory)
+        reader.recover()
+        elapsed = time.perf_counter() - start
+        reader._file.close()
+
+    print(f"Recovered {entities} positions + {tail} journal records in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000, int(sys.argv[2]) if len(sys.argv) > 2 else 100000)
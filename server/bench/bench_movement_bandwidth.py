@@ -0,0 +1,86 @@
+"""
+Server -> client movement traffic of per-tick position deltas versus move events, for players on the client map
+who each click a new random target every few seconds. Every message is broadcast to every player.
+
+    python server/bench/bench_movement_bandwidth.py [players] [seconds]
+"""
+import math
+import random
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[2]
+sys.path.append(str(root))
+sys.path.append(str(root / 'server'))
+
+import pathfinding
+from server import packet
+
+TICKRATE = 20
+SPEED = 70
+
+
+def position_delta(actor_id: int, pos: list) -> bytes:
+    return bytes(packet.ModelDeltaPacket({
+        "id": actor_id, "model_type": "Actor",
+        "instanced_entity": {"id": actor_id, "model_type": "InstancedEntity", "x": pos[0], "y": pos[1]},
+    }))
+
+
+def main(players: int, seconds: int):
+    random.seed(0)
+    grid = pathfinding.CollisionGrid.from_tscn(root / 'client' / 'Main.tscn')
+    cells = list(grid.walkable)
+
+    per_tick = [0, 0]   # messages, bytes per recipient
+    events = [0, 0]
+    for actor_id in range(players):
+        pos = grid.center_of(random.choice(cells))
+        moving = False
+        t = random.uniform(0, 5)
+        while t < seconds:
+            # The next click cuts this move short, as a new Target does on the server
+            until = min(t + random.uniform(3, 8), seconds)
+            target = [c + random.uniform(-20, 20) for c in grid.center_of(random.choice(cells))]
+            waypoints = grid.find_path(pos, target)
+            if waypoints is None:
+                # Unreachable: a moving actor is stopped where it is
+                if moving:
+                    events[0] += 1
+                    events[1] += len(position_delta(actor_id, pos))
+                moving = False
+                t = until
+                continue
+
+            moving = True
+            for waypoint in waypoints:
+                if t >= until:
+                    break
+                length = math.dist(pos, waypoint)
+                travelled = min(length, SPEED * (until - t))
+                # Per-tick model: one delta every tick spent moving
+                for _ in range(max(1, int(travelled / SPEED * TICKRATE))):
+                    per_tick[0] += 1
+                    per_tick[1] += len(position_delta(actor_id, pos))
+                # Event model: one Move per segment started
+                events[0] += 1
+                events[1] += len(bytes(packet.MovePacket(actor_id, *pos, *waypoint, SPEED, time.time())))
+                pos = [p + (w - p) * travelled / length for p, w in zip(pos, waypoint)] if length else waypoint
+                t += travelled / SPEED
+                if travelled < length:
+                    break
+            else:
+                # Reached the target before the next click: one stop delta
+                events[0] += 1
+                events[1] += len(position_delta(actor_id, pos))
+                moving = False
+            t = until
+
+    for name, (messages, size) in (("per-tick deltas", per_tick), ("move events", events)):
+        print(f"{name:>16}: {messages * players / seconds:>10.0f} msgs/s, "
+              f"{size * players / seconds / 1024:>9.1f} KiB/s total for {players} players")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100, int(sys.argv[2]) if len(sys.argv) > 2 else 60)
@@ -0,0 +1,54 @@
+"""
+Path queries per second: the real client map and larger synthetic maps with random walls, for a number of players
+each clicking random walkable targets. Reports uncached A* throughput and throughput with the path cache warm.
+
+    python server/bench/bench_pathfinding.py [players] [queries]
+"""
+import random
+import sys
+import time
+from pathlib import Path
+
+root = Path(__file__).resolve().parents[2]
+sys.path.append(str(root / 'server'))
+
+import pathfinding
+
+
+def synthetic(size: int, wall_chance: float = 0.15) -> pathfinding.CollisionGrid:
+    walkable = {(x, y) for x in range(size) for y in range(size) if random.random() > wall_chance}
+    return pathfinding.CollisionGrid(walkable, 64)
+
+
+def run(name: str, grid: pathfinding.CollisionGrid, players: int, queries: int):
+    cells = list(grid.walkable)
+    positions = [grid.center_of(random.choice(cells)) for _ in range(players)]
+    targets = [grid.center_of(random.choice(cells)) for _ in range(queries)]
+
+    grid.find_cell_path.cache_clear()
+    start = time.perf_counter()
+    for i, target in enumerate(targets):
+        grid.find_cell_path.cache_clear()
+        grid.find_path(positions[i % players], target)
+    cold = queries / (time.perf_counter() - start)
+
+    # Same clicks again with the cache warm from the pass below
+    for i, target in enumerate(targets):
+        grid.find_path(positions[i % players], target)
+    start = time.perf_counter()
+    for i, target in enumerate(targets):
+        grid.find_path(positions[i % players], target)
+    warm = queries / (time.perf_counter() - start)
+
+    print(f"{name:>22}: {len(cells):>6} cells, {cold:>9.0f} queries/s uncached, {warm:>9.0f} queries/s cached")
+
+
+def main(players: int, queries: int):
+    random.seed(0)
+    run("client/Main.tscn", pathfinding.CollisionGrid.from_tscn(root / 'client' / 'Main.tscn'), players, queries)
+    for size in (64, 128, 256):
+        run(f"{size}x{size} random walls", synthetic(size), players, queries)
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200, int(sys.argv[2]) if len(sys.argv) > 2 else 1000)
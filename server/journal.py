@@ -0,0 +1,105 @@
+import json
+import mmap
+import os
+from pathlib import Path
+from server import models
+
+
+class WorldJournal:
+    """
+    Append-only log of actor position changes with periodic snapshots. Positions are the only world state that isn't
+    written straight to the database (world items and inventories still are, since they need database ids).
+    Every record holds an absolute value, so replaying a record that is already reflected in a snapshot is harmless.
+    """
+
+    JOURNAL_FILE = "world.journal"
+    SNAPSHOT_FILE = "world.snapshot"
+
+    def __init__(self, directory: str, snapshot_every: int = 50000):
+        self._dir: Path = Path(directory)
+        self._dir.mkdir(parents=True, exist_ok=True)
+        self._journal_path: Path = self._dir / self.JOURNAL_FILE
+        self._snapshot_path: Path = self._dir / self.SNAPSHOT_FILE
+        self._snapshot_every: int = snapshot_every
+        self._records_since_snapshot: int = 0
+
+        # Instanced entity id (as a string, like JSON object keys) -> [x, y]
+        self.positions: dict[str, list] = {}
+
+        # Positions not yet folded into the database
+        self._dirty_positions: set[int] = set()
+
+        self._file = None
+
+    def recover(self) -> dict:
+        "Load the latest snapshot, replay the journal tail on top of it and open the journal for appending"
+        if self._snapshot_path.exists():
+            with open(self._snapshot_path, 'r', encoding='utf-8') as f:
+                self.positions = json.load(f)
+
+        replayed: int = 0
+        if self._journal_path.exists() and self._journal_path.stat().st_size > 0:
+            with open(self._journal_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                for line in iter(m.readline, b''):
+                    try:
+                        record: dict = json.loads(line)
+                    except ValueError:
+                        # A torn write at the end of the file from a crash; everything before it is intact
+                        print(f"Stopping journal replay at truncated record after {replayed} records")
+                        break
+                    self._apply(record)
+                    replayed += 1
+
+        self._records_since_snapshot = replayed
+        self._file = open(self._journal_path, 'ab')
+        print(f"Recovered {len(self.positions)} positions ({replayed} journal records replayed)")
+        return self.positions
+
+    def record_position(self, instanced_entity_id: int, x: float, y: float):
+        self._append({"id": instanced_entity_id, "x": x, "y": y})
+
+    def _append(self, record: dict):
+        self._apply(record)
+        # Flushed per record so a crash of the process loses nothing; compact() fsyncs for power loss
+        self._file.write(json.dumps(record, separators=(',', ':')).encode('utf-8') + b'\n')
+        self._file.flush()
+        self._records_since_snapshot += 1
+        if self._records_since_snapshot >= self._snapshot_every:
+            self.snapshot()
+
+    def _apply(self, record: dict):
+        "Apply a journal record to the in-memory positions and mark it for the next compaction"
+        self.positions[str(record["id"])] = [record["x"], record["y"]]
+        self._dirty_positions.add(record["id"])
+
+    def snapshot(self):
+        "Write the current positions as a compact snapshot and start a fresh journal"
+        # Everything the journal holds must reach the database before the journal is truncated
+        self.compact()
+
+        tmp_path: Path = self._snapshot_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.positions, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._snapshot_path)
+
+        # If we crash before the truncate, the old journal is simply replayed over the new snapshot
+        self._file.close()
+        self._file = open(self._journal_path, 'wb')
+        self._records_since_snapshot = 0
+
+    def compact(self):
+        "Fold every position recorded since the last compaction into the database in bulk"
+        os.fsync(self._file.fileno())
+
+        ientities = [
+            models.InstancedEntity(id=i, x=self.positions[str(i)][0], y=self.positions[str(i)][1])
+            for i in self._dirty_positions
+        ]
+        models.InstancedEntity.objects.bulk_update(ientities, ["x", "y"], batch_size=1000)
+        self._dirty_positions.clear()
+
+    def close(self):
+        self.snapshot()
+        self._file.close()
@@ -16,6 +16,8 @@ class Action(enum.Enum):
     ItemRemove = enum.auto()
     Inventory = enum.auto()
     InventoryRequest = enum.auto()
+    Queue = enum.auto()
+    Move = enum.auto()
 
 
 class Packet:
@@ -85,6 +87,14 @@ class InventoryRequestPacket(Packet):
     def __init__(self):
         super().__init__(Action.InventoryRequest)
 
+class MovePacket(Packet):
+    def __init__(self, actor_id: int, start_x: float, start_y: float, t_x: float, t_y: float, speed: float, start_time: float):
+        super().__init__(Action.Move, actor_id, start_x, start_y, t_x, t_y, speed, start_time)
+
+class QueuePacket(Packet):
+    def __init__(self, position: int):
+        super().__init__(Action.Queue, position)
+
 
 def from_json(json_str: str) -> Packet:
     obj_dict = json.loads(json_str)
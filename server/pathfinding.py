@@ -0,0 +1,155 @@
+import functools
+import heapq
+import math
+import re
+from pathlib import Path
+
+
+class CollisionGrid:
+    """
+    Walkable cells of the client's TileMap, built once at startup. A cell is walkable if the map has a tile there;
+    anything outside the painted area is a wall. Paths are cached per (start cell, goal cell) since the grid never changes.
+    """
+
+    # 8-way movement: (d_x, d_y, cost)
+    NEIGHBOURS = [
+        (1, 0, 1.0), (-1, 0, 1.0), (0, 1, 1.0), (0, -1, 1.0),
+        (1, 1, math.sqrt(2)), (1, -1, math.sqrt(2)), (-1, 1, math.sqrt(2)), (-1, -1, math.sqrt(2)),
+    ]
+
+    def __init__(self, walkable: set[tuple[int, int]], cell_size: float):
+        self.walkable: frozenset[tuple[int, int]] = frozenset(walkable)
+        self.cell_size: float = cell_size
+        self.find_cell_path = functools.lru_cache(maxsize=4096)(self._find_cell_path)
+
+    @classmethod
+    def from_tscn(cls, scene_path: Path) -> 'CollisionGrid':
+        "Build the grid from the `TileMap` node of a Godot 3 scene file"
+        text: str = scene_path.read_text(encoding='utf-8')
+        tilemap: str = text[text.index('[node name="TileMap"'):]
+
+        scale: float = float(re.search(r'scale = Vector2\( ([\d.]+),', tilemap).group(1))
+        cell: float = float(re.search(r'cell_size = Vector2\( ([\d.]+),', tilemap).group(1))
+        data: list = [int(v) for v in re.search(r'tile_data = PoolIntArray\(([^)]*)\)', tilemap).group(1).split(',')]
+
+        walkable: set = set()
+        for key in data[::3]:  # Entries are (cell key, tile id, autotile coord) triples
+            # Godot packs the cell as two int16s: y in the high half, x in the low half
+            x: int = key & 0xFFFF
+            if x >= 0x8000:
+                x -= 0x10000
+            walkable.add((x, key >> 16))
+
+        return cls(walkable, cell * scale)
+
+    def cell_of(self, pos: list) -> tuple[int, int]:
+        return (math.floor(pos[0] / self.cell_size), math.floor(pos[1] / self.cell_size))
+
+    def center_of(self, cell: tuple[int, int]) -> list:
+        return [(cell[0] + 0.5) * self.cell_size, (cell[1] + 0.5) * self.cell_size]
+
+    def find_path(self, start: list, goal: list) -> list:
+        """
+        Return the waypoints (in world coordinates) leading from start to goal, ending with goal itself,
+        or None if the goal can't be reached. Waypoints that can be skipped in a straight line are dropped,
+        so crossing open ground is a single waypoint.
+        """
+        cells: tuple = self.find_cell_path(self.cell_of(start), self.cell_of(goal))
+        if cells is None:
+            return None
+        points: list = [self.center_of(c) for c in cells[1:-1]] + [list(goal)]
+
+        # String pulling: from each anchor, head for the furthest point still in a straight line of sight
+        waypoints: list = []
+        anchor: list = start
+        for i in range(len(points) - 1):
+            if not self.line_of_sight(anchor, points[i + 1]):
+                waypoints.append(points[i])
+                anchor = points[i]
+        waypoints.append(points[-1])
+        return waypoints
+
+    def line_of_sight(self, a: list, b: list) -> bool:
+        "Whether every cell the segment from a to b passes through is walkable (walking the grid like a DDA)"
+        cell_x, cell_y = self.cell_of(a)
+        end_x, end_y = self.cell_of(b)
+        d_x: float = (b[0] - a[0]) / self.cell_size
+        d_y: float = (b[1] - a[1]) / self.cell_size
+        step_x: int = 1 if d_x > 0 else -1
+        step_y: int = 1 if d_y > 0 else -1
+
+        # Parametric distance (0..1 along the segment) to the next vertical / horizontal cell border
+        def first_border(pos: float, cell: int, step: int, d: float) -> float:
+            if d == 0:
+                return math.inf
+            border: float = (cell + (step > 0)) * self.cell_size
+            return (border - pos) / (d * self.cell_size)
+
+        t_x: float = first_border(a[0], cell_x, step_x, d_x)
+        t_y: float = first_border(a[1], cell_y, step_y, d_y)
+        delta_x: float = abs(1 / d_x) if d_x else math.inf
+        delta_y: float = abs(1 / d_y) if d_y else math.inf
+
+        if (cell_x, cell_y) not in self.walkable:
+            return False
+        # One step per cell border crossed, so floating point error can't walk us past the end cell
+        for _ in range(abs(end_x - cell_x) + abs(end_y - cell_y)):
+            if (cell_x, cell_y) == (end_x, end_y):
+                break
+            if math.isclose(t_x, t_y):
+                # Passing exactly through a corner touches both neighbouring cells
+                if (cell_x + step_x, cell_y) not in self.walkable or (cell_x, cell_y + step_y) not in self.walkable:
+                    return False
+                cell_x += step_x
+                cell_y += step_y
+                t_x += delta_x
+                t_y += delta_y
+            elif t_x < t_y:
+                cell_x += step_x
+                t_x += delta_x
+            else:
+                cell_y += step_y
+                t_y += delta_y
+            if (cell_x, cell_y) not in self.walkable:
+                return False
+        return True
+
+    def _find_cell_path(self, start: tuple[int, int], goal: tuple[int, int]) -> tuple:
+        "A* over the grid, returning the cells from start to goal inclusive"
+        if goal not in self.walkable:
+            return None
+        if start == goal:
+            return (start,)
+
+        def heuristic(c: tuple[int, int]) -> float:
+            # Octile distance
+            d_x, d_y = abs(c[0] - goal[0]), abs(c[1] - goal[1])
+            return max(d_x, d_y) + (math.sqrt(2) - 1) * min(d_x, d_y)
+
+        came_from: dict = {start: None}
+        cost: dict = {start: 0.0}
+        frontier: list = [(heuristic(start), start)]
+
+        while frontier:
+            _, current = heapq.heappop(frontier)
+            if current == goal:
+                path: list = []
+                while current is not None:
+                    path.append(current)
+                    current = came_from[current]
+                return tuple(reversed(path))
+
+            for d_x, d_y, step in self.NEIGHBOURS:
+                nxt: tuple = (current[0] + d_x, current[1] + d_y)
+                if nxt not in self.walkable:
+                    continue
+                # Don't cut corners diagonally past a wall
+                if d_x and d_y and ((current[0] + d_x, current[1]) not in self.walkable or (current[0], current[1] + d_y) not in self.walkable):
+                    continue
+                new_cost: float = cost[current] + step
+                if nxt not in cost or new_cost < cost[nxt]:
+                    cost[nxt] = new_cost
+                    came_from[nxt] = current
+                    heapq.heappush(frontier, (new_cost + heuristic(nxt), nxt))
+
+        return None
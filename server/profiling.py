@@ -0,0 +1,76 @@
+import cProfile
+import collections
+import signal
+import time
+from pathlib import Path
+from twisted.internet import reactor
+
+
+class TickProfiler:
+    """
+    On-demand profiler for the live tick loop, controlled by signals so only someone with access to the server
+    process can use it:
+        kill -USR1 <pid>  -> cProfile GameFactory.tick (and everything it calls) for `duration` seconds, written as .pstats
+        kill -USR2 <pid>  -> sample the whole process stack for `duration` seconds, written as .collapsed for flamegraph.pl
+    When neither is running the only cost is a None check per tick.
+    """
+
+    def __init__(self, output_dir: str = "profiles", duration: float = 10, sample_interval: float = 0.005):
+        self._output_dir: Path = Path(output_dir)
+        self._duration: float = duration
+        self._sample_interval: float = sample_interval
+        self.profile: cProfile.Profile = None
+        self._samples: collections.Counter = None
+
+    def install_signal_handlers(self):
+        if not hasattr(signal, 'SIGUSR1') or not hasattr(signal, 'setitimer'):
+            print("Tick profiling is unavailable on this platform (no SIGUSR1/SIGUSR2/ITIMER_PROF)")
+            return
+        signal.signal(signal.SIGUSR1, lambda signum, frame: reactor.callFromThread(self.start_cprofile))
+        signal.signal(signal.SIGUSR2, lambda signum, frame: reactor.callFromThread(self.start_sampling))
+
+    def start_cprofile(self):
+        if self.profile or self._samples is not None:
+            print("Profiler already running, ignoring request")
+            return
+        print(f"Profiling tick loop with cProfile for {self._duration} seconds")
+        self.profile = cProfile.Profile()
+        reactor.callLater(self._duration, self._stop_cprofile)
+
+    def _stop_cprofile(self):
+        profile, self.profile = self.profile, None
+        path: Path = self._output_path("pstats")
+        profile.dump_stats(str(path))
+        print(f"Wrote tick profile to {path}")
+
+    def start_sampling(self):
+        if self.profile or self._samples is not None:
+            print("Profiler already running, ignoring request")
+            return
+        print(f"Sampling server stacks every {self._sample_interval}s for {self._duration} seconds")
+        self._samples = collections.Counter()
+        signal.signal(signal.SIGPROF, self._sample)
+        signal.setitimer(signal.ITIMER_PROF, self._sample_interval, self._sample_interval)
+        reactor.callLater(self._duration, self._stop_sampling)
+
+    def _sample(self, signum, frame):
+        stack: list = []
+        while frame:
+            code = frame.f_code
+            stack.append(f"{Path(code.co_filename).name}:{code.co_name}")
+            frame = frame.f_back
+        self._samples[";".join(reversed(stack))] += 1
+
+    def _stop_sampling(self):
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        signal.signal(signal.SIGPROF, signal.SIG_DFL)
+        samples, self._samples = self._samples, None
+        path: Path = self._output_path("collapsed")
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, count in samples.items():
+                f.write(f"{stack} {count}\n")
+        print(f"Wrote {sum(samples.values())} stack samples to {path}")
+
+    def _output_path(self, extension: str) -> Path:
+        self._output_dir.mkdir(parents=True, exist_ok=True)
+        return self._output_dir / f"tick-{time.strftime('%Y%m%d-%H%M%S')}.{extension}"
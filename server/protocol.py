@@ -5,6 +5,7 @@ import os
 import math
 import utils
 import queue
+import collections
 import time
 import hmac
 import hashlib
@@ -15,6 +16,7 @@ from server import models
 from server.secrets import get_config
 from autobahn.twisted.websocket import WebSocketServerProtocol
 from autobahn.exception import Disconnected
+from django.db import transaction
 
 # Get configuration from Secrets Manager
 config = get_config()
@@ -26,12 +28,18 @@ class GameServerProtocol(WebSocketServerProtocol):
         self._state: callable = self.LOGIN
         self._actor: models.Actor = None
         self._player_target: list = None
-        self._last_delta_time_checked = None
+        self._waypoints: collections.deque = collections.deque()
+        self._speed: float = 70
+        self._move_start: list = None
+        self._move_start_time: float = None
         self._known_others: set['GameServerProtocol'] = set()
         self._cognito_client = boto3.client('cognito-idp', region_name=config['AWS_DEFAULT_REGION'])
         self._client_secret = config['AWS_COGNITO_CLIENT_SECRET']
         self._client_id = config['AWS_COGNITO_CLIENT_ID']
         self._last_item_spawn = 0
+        # World item id -> WorldItem still to be sent in the initial sync (insertion ordered)
+        self._world_sync: dict[int, models.WorldItem] = {}
+        self._world_sync_chunk: int = 50
     
     def _get_secret_hash(self, username: str) -> str:
         """Generate SECRET_HASH for Cognito authentication"""
@@ -64,13 +72,11 @@ class GameServerProtocol(WebSocketServerProtocol):
                 )
                 print("Cognito login successful")
                 
-                user, created = models.User.objects.get_or_create(
-                    username=username,
-                    defaults={'cognito_user_id': username}
-                )
-                
                 try:
-                    self._actor = models.Actor.objects.get(user=user)
+                    # Load the whole actor graph used by create_dict in one query
+                    self._actor = models.Actor.objects.select_related('user', 'instanced_entity__entity').get(
+                        user__username=username
+                    )
                     print("Actor found for user")
                 except models.Actor.DoesNotExist:
                     print("No actor found for user")
@@ -81,16 +87,16 @@ class GameServerProtocol(WebSocketServerProtocol):
                 self.broadcast(packet.ModelDeltaPacket(models.create_dict(self._actor)))
                 self._state = self.PLAY
                 
-                # Send existing world items to player
-                world_items = models.WorldItem.objects.all()
-                for world_item in world_items:
-                    self.send_client(packet.ItemSpawnPacket(models.create_dict(world_item)))
+                # Send existing world items to player a chunk per tick, see _send_world_sync_chunk
+                self._world_sync = {w.id: w for w in models.WorldItem.objects.select_related('item')}
                 
                 # Send current inventory
                 self._send_inventory()
                 
                 # Spawn test items (only once)
-                self._spawn_test_items()
+                if not self.factory.test_items_spawned:
+                    self.factory.test_items_spawned = True
+                    self._spawn_test_items()
                 
                 print("Login completed successfully")
                 
@@ -125,21 +131,23 @@ class GameServerProtocol(WebSocketServerProtocol):
                 
                 print("Creating database records...")
                 try:
-                    user = models.User(username=username, cognito_user_id=username)
-                    user.save()
-                    print("User saved")
-                    player_entity = models.Entity(name=username)
-                    player_entity.save()
-                    print("Entity saved")
-                    player_ientity = models.InstancedEntity(entity=player_entity, x=0, y=0)
-                    player_ientity.save()
-                    print("InstancedEntity saved")
-                    player = models.Actor(instanced_entity=player_ientity, user=user, avatar_id=avatar_id)
-                    player.save()
-                    print("Actor saved")
+                    # All or nothing, committed once
+                    with transaction.atomic():
+                        user = models.User.objects.create(username=username, cognito_user_id=username)
+                        player_entity = models.Entity.objects.create(name=username)
+                        player_ientity = models.InstancedEntity.objects.create(entity=player_entity, x=0, y=0)
+                        models.Actor.objects.create(instanced_entity=player_ientity, user=user, avatar_id=avatar_id)
                     print("Database records created")
                 except Exception as db_error:
                     print(f"Database error: {db_error}")
+                    # Don't leave a Cognito user behind that can never log in
+                    try:
+                        self._cognito_client.admin_delete_user(
+                            UserPoolId=config['AWS_COGNITO_USER_POOL_ID'],
+                            Username=username
+                        )
+                    except Exception as cleanup_error:
+                        print(f"Could not delete Cognito user {username} after database error: {cleanup_error}")
                     raise db_error
                 
                 self.send_client(packet.OkPacket())
@@ -171,10 +179,27 @@ class GameServerProtocol(WebSocketServerProtocol):
             if sender not in self._known_others:
                 # Send our full model data to the new player
                 sender.onPacket(self, packet.ModelDeltaPacket(models.create_dict(self._actor)))
+                if self._player_target:
+                    # They missed the start of our current move, so resend it
+                    sender.onPacket(self, self._move_packet())
                 self._known_others.add(sender)
+        
+        elif p.action == packet.Action.Move:
+            self.send_client(p)
+        
+        elif p.action == packet.Action.ItemSpawn:
+            # Sent now, so it mustn't be sent again by a world sync still in progress
+            self._world_sync.pop(p.payloads[0]["id"], None)
+            self.send_client(p)
+        
+        elif p.action == packet.Action.ItemRemove:
+            # Don't let a world sync still in progress spawn the removed item afterwards
+            self._world_sync.pop(p.payloads[0], None)
+            if sender != self:  # _handle_pickup already sent it to us
+                self.send_client(p)
                 
         elif p.action == packet.Action.Target:
-            self._player_target = p.payloads
+            self._set_target(list(p.payloads))
         
         elif p.action == packet.Action.Pickup:
             item_id = p.payloads[0]
@@ -188,33 +213,86 @@ class GameServerProtocol(WebSocketServerProtocol):
             self._known_others.discard(sender)
             self.send_client(p)
 
-    def _update_position(self) -> bool:
-        "Attempt to update the actor's position and return true only if the position was changed"
-        if not self._player_target:
-            return False
+    def _set_target(self, target: list):
+        "Plan a path around the map's walls to the target, or stop where we are if it can't be reached"
+        self._catch_up_position()
         pos = [self._actor.instanced_entity.x, self._actor.instanced_entity.y]
+        grid = self.factory.collision_grid
+        waypoints = grid.find_path(pos, target) if grid else [target]
+        if waypoints is None:
+            if self._player_target:
+                self._stop_moving()
+            else:
+                # Our client already started walking towards the target, so put it back where we are
+                self.send_client(self._position_packet())
+            return
 
-        now: float = time.time()
-        delta_time: float = 1 / self.factory.tickrate
-        if self._last_delta_time_checked:
-            delta_time = now - self._last_delta_time_checked
-        self._last_delta_time_checked = now
+        self._player_target = target
+        self._waypoints = collections.deque(waypoints)
+        self._start_segment()
 
-        # Use delta time to calculate distance to travel this time
-        dist: float = 70 * delta_time
-        
-        # Early exit if we are already within an acceptable distance of the target
-        if math.dist(pos, self._player_target) < dist:
+    def _start_segment(self):
+        "Start moving towards the next waypoint, telling clients once so they can extrapolate instead of us sending every tick"
+        ientity = self._actor.instanced_entity
+        self._move_start = [ientity.x, ientity.y]
+        self._move_start_time = time.time()
+        self.broadcast(self._move_packet())
+        self.factory.journal.record_position(ientity.id, ientity.x, ientity.y)
+
+    def _move_packet(self) -> packet.MovePacket:
+        t_x, t_y = self._waypoints[0]
+        return packet.MovePacket(self._actor.id, *self._move_start, t_x, t_y, self._speed, self._move_start_time)
+
+    def _stop_moving(self):
+        "Stop the actor and send its final position, which also corrects any client extrapolation error"
+        if not self._player_target:
+            return
+        self._player_target = None
+        self._waypoints.clear()
+
+        ientity = self._actor.instanced_entity
+        self.broadcast(self._position_packet())
+        self.factory.journal.record_position(ientity.id, ientity.x, ientity.y)
+
+    def _position_packet(self) -> packet.ModelDeltaPacket:
+        ientity = self._actor.instanced_entity
+        return packet.ModelDeltaPacket({
+            "id": self._actor.id,
+            "model_type": "Actor",
+            "instanced_entity": {"id": ientity.id, "model_type": "InstancedEntity", "x": ientity.x, "y": ientity.y},
+        })
+
+    def _catch_up_position(self) -> bool:
+        """
+        Move the actor to where it is by now along its current segment, the same way clients extrapolate it,
+        since ticks busy with packets don't update the position. Returns true once the segment's waypoint is reached.
+        """
+        if not self._player_target:
             return False
-        
-        # Update our model if we're not already close enough to the target
-        d_x, d_y = utils.direction_to(pos, self._player_target)
-        self._actor.instanced_entity.x += d_x * dist
-        self._actor.instanced_entity.y += d_y * dist
-        # amazonq-ignore-next-line
-        self._actor.instanced_entity.save()
+        waypoint: list = self._waypoints[0]
+        ientity = self._actor.instanced_entity
 
+        length: float = math.dist(self._move_start, waypoint)
+        travelled: float = self._speed * (time.time() - self._move_start_time)
+        if travelled < length:
+            d_x, d_y = utils.direction_to(self._move_start, waypoint)
+            ientity.x = self._move_start[0] + d_x * travelled
+            ientity.y = self._move_start[1] + d_y * travelled
+            return False
+
+        ientity.x, ientity.y = waypoint
         return True
+
+    def _update_position(self):
+        "Advance the actor along its current move segment, starting the next one or stopping once a waypoint is reached"
+        if not self._catch_up_position():
+            return
+
+        self._waypoints.popleft()
+        if self._waypoints:
+            self._start_segment()
+        else:
+            self._stop_moving()
     
     def _check_item_respawn(self):
         """Check if items need to respawn every 20 seconds"""
@@ -245,9 +323,10 @@ class GameServerProtocol(WebSocketServerProtocol):
         """Handle item pickup by player"""
         try:
             # Find the world item
-            world_item = models.WorldItem.objects.get(id=item_id)
+            world_item = models.WorldItem.objects.select_related('item').get(id=item_id)
             
             # Check if item is close enough to player
+            self._catch_up_position()
             player_x = self._actor.instanced_entity.x
             player_y = self._actor.instanced_entity.y
             item_x = world_item.x
@@ -287,7 +366,7 @@ class GameServerProtocol(WebSocketServerProtocol):
     
     def _send_inventory(self):
         """Send current inventory to player"""
-        inventory_items = models.Inventory.objects.filter(actor=self._actor)
+        inventory_items = models.Inventory.objects.filter(actor=self._actor).select_related('item')
         inventory_data = []
         
         for inv_item in inventory_items:
@@ -320,7 +399,18 @@ class GameServerProtocol(WebSocketServerProtocol):
             self.broadcast(packet.ItemSpawnPacket(models.create_dict(world_potion)))
             print(f"Spawned potion at (150,100)")
 
+    def _send_world_sync_chunk(self):
+        "Send the next few world items of the initial sync, so a burst of logins doesn't stall the tick"
+        for _ in range(min(self._world_sync_chunk, len(self._world_sync))):
+            world_item = self._world_sync.pop(next(iter(self._world_sync)))
+            self.send_client(packet.ItemSpawnPacket(models.create_dict(world_item)))
+        if not self._world_sync:
+            self.factory.finish_login(self)
+
     def tick(self):
+        if self._world_sync:
+            self._send_world_sync_chunk()
+
         # Process the next packet in the queue
         if not self._packet_queue.empty():
             print(f"Processing packet from queue, queue size: {self._packet_queue.qsize()}")
@@ -328,13 +418,13 @@ class GameServerProtocol(WebSocketServerProtocol):
             print(f"Calling state function: {self._state.__name__} with packet: {p.action}")
             self._state(s, p)
 
+            # Free the login slot unless there's still a world sync to stream
+            if s == self and p.action in (packet.Action.Login, packet.Action.Register) and not self._world_sync:
+                self.factory.finish_login(self)
+
         # To do when there are no packets to process
         elif self._state == self.PLAY: 
-            # amazonq-ignore-next-line
-            actor_dict_before: dict = models.create_dict(self._actor)
-            if self._update_position():
-                actor_dict_after: dict = models.create_dict(self._actor)
-                self.broadcast(packet.ModelDeltaPacket(models.get_delta_dict(actor_dict_before, actor_dict_after)))
+            self._update_position()
             
             # Check if items need to respawn
             self._check_item_respawn()
@@ -357,8 +447,15 @@ class GameServerProtocol(WebSocketServerProtocol):
     # Override
     def onClose(self, wasClean, code, reason):
         if self._actor:
+            self._catch_up_position()
             self._actor.save()
+            # Journal the final position too, or the next compaction would put back the one from the segment start.
+            # It's also saved now so a quick reconnect doesn't wait on that compaction.
+            ientity = self._actor.instanced_entity
+            self.factory.journal.record_position(ientity.id, ientity.x, ientity.y)
+            ientity.save()
             self.broadcast(packet.DisconnectPacket(self._actor.id), exclude_self=True)
+        self.factory.forget_login(self)
         self.factory.players.remove(self)
         print(f"Websocket connection closed{' unexpectedly' if not wasClean else ' cleanly'} with code {code}: {reason}")
 
@@ -376,7 +473,17 @@ class GameServerProtocol(WebSocketServerProtocol):
 
         self.onPacket(self, p)
 
-    def onPacket(self, sender: 'GameServerProtocol', p: packet.Packet):
+    def onPacket(self, sender: 'GameServerProtocol', p: packet.Packet, admitted: bool = False):
+        # Logins wait for the factory to admit them, see GameFactory.queue_login
+        if sender == self and not admitted and self._state == self.LOGIN and p.action in (packet.Action.Login, packet.Action.Register):
+            self.factory.queue_login(self, p)
+            return
+
+        # Nothing other players broadcast matters before we're in the world (the world sync covers it), and queueing
+        # it would hold our admitted login up behind the backlog while it takes a login slot
+        if sender != self and self._state == self.LOGIN:
+            return
+
         self._packet_queue.put((sender, p))
         # amazonq-ignore-next-line
         print(f"Queued packet: {p}")
@@ -386,7 +493,7 @@ class GameServerProtocol(WebSocketServerProtocol):
     def send_client(self, p: packet.Packet):
         b = bytes(p)
         try:
-            self.sendMessage(b)
+            self.sendMessage(b, doNotCompress=len(b) < self.factory.compression_min_size)
         except Disconnected:
             print(f"Couldn't send {p} because client disconnected.")
 
@@ -0,0 +1,48 @@
+import contextlib
+from django.db import connection
+
+# Maximum number of queries each packet handler may run, as measured by tests/test_query_budget.py. Login assumes
+# the test items were already spawned (GameFactory.test_items_spawned), since only the first login after startup does that.
+HANDLER_BUDGETS: dict[str, int] = {
+    "Login": 3,             # Actor graph, world item sync, inventory
+    "Register": 4,          # User, Entity, InstancedEntity and Actor inserts in one transaction
+    "Pickup": 5,            # World item, inventory get_or_create (select + insert), delete, inventory resend
+    "InventoryRequest": 1,
+    "tick": 6,              # Item respawn check (2 item lookups, 2 exists) and 2 respawns, every 20 seconds
+}
+
+TRANSACTION_STATEMENTS: tuple[str, ...] = ("BEGIN", "COMMIT", "ROLLBACK", "SAVEPOINT", "RELEASE SAVEPOINT")
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextlib.contextmanager
+def query_budget(handler: str, max_queries: int = None):
+    """
+    Fail with QueryBudgetExceeded if the block runs more queries than the handler's budget, e.g.
+
+        with query_budget("Pickup"):
+            protocol.PLAY(protocol, packet.PickupPacket(item_id))
+
+    Yields the list of executed SQL statements so tests can inspect them. Transaction control statements
+    (BEGIN, SAVEPOINT, ...) aren't counted, since whether they go through a cursor depends on the database backend.
+    """
+    if max_queries is None:
+        max_queries = HANDLER_BUDGETS[handler]
+
+    queries: list[str] = []
+
+    def record(execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_STATEMENTS):
+            queries.append(sql)
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(record):
+        yield queries
+
+    if len(queries) > max_queries:
+        raise QueryBudgetExceeded(
+            f"{handler} ran {len(queries)} queries, budget is {max_queries}:\n" + "\n".join(queries)
+        )
@@ -51,4 +51,8 @@ def get_config():
             'DB_PASSWORD': os.getenv('DB_PASSWORD'),
             'DB_HOST': os.getenv('DB_HOST'),
             'DB_PORT': os.getenv('DB_PORT'),
+            'WORLD_JOURNAL_DIR': os.getenv('WORLD_JOURNAL_DIR'),
+            'WS_COMPRESSION_WINDOW_BITS': os.getenv('WS_COMPRESSION_WINDOW_BITS'),
+            'WS_COMPRESSION_NO_CONTEXT_TAKEOVER': os.getenv('WS_COMPRESSION_NO_CONTEXT_TAKEOVER'),
+            'WS_COMPRESSION_MIN_SIZE': os.getenv('WS_COMPRESSION_MIN_SIZE'),
         }
\ No newline at end of file
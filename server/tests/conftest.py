@@ -0,0 +1,25 @@
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+server_dir = Path(__file__).resolve().parents[1]
+sys.path.append(str(server_dir.parent))
+sys.path.append(str(server_dir))
+
+# In-memory sqlite and dummy Cognito settings instead of Secrets Manager / .env
+os.environ.update({
+    'DB_ENGINE': 'django.db.backends.sqlite3',
+    'DB_NAME': ':memory:',
+    'AWS_DEFAULT_REGION': 'us-east-1',
+    'AWS_COGNITO_USER_POOL_ID': 'pool',
+    'AWS_COGNITO_CLIENT_ID': 'client',
+    'AWS_COGNITO_CLIENT_SECRET': 'secret',
+})
+with mock.patch('server.secrets.get_secret', return_value=None):
+    import manage
+    import protocol
+
+from django.core.management import call_command
+
+call_command('migrate', verbosity=0)
@@ -0,0 +1,63 @@
+import tempfile
+from unittest import mock
+
+import journal
+import protocol
+from django.test import TransactionTestCase
+from server import packet
+
+
+class StubFactory:
+    "Just enough of GameFactory for the protocol's handlers"
+
+    def __init__(self, journal_dir: str):
+        self.players: set = set()
+        self.tickrate: int = 20
+        self.collision_grid = None
+        self.test_items_spawned: bool = True
+        self.compression_min_size: int = 192
+        self.journal = journal.WorldJournal(journal_dir)
+        self.journal.recover()
+
+    def finish_login(self, p):
+        pass
+
+    def forget_login(self, p):
+        pass
+
+
+class ProtocolTestCase(TransactionTestCase):
+    "Drives GameServerProtocol handlers directly, with a stub factory, mocked Cognito and no transport"
+
+    def setUp(self):
+        self._journal_dir = tempfile.TemporaryDirectory()
+        self.factory = StubFactory(self._journal_dir.name)
+
+    def tearDown(self):
+        self.factory.journal._file.close()
+        self._journal_dir.cleanup()
+
+    def _protocol(self) -> protocol.GameServerProtocol:
+        p = protocol.GameServerProtocol()
+        p.factory = self.factory
+        p._cognito_client = mock.Mock()
+        p.sendMessage = mock.Mock()
+        self.factory.players.add(p)
+        return p
+
+    def _sent(self, p: protocol.GameServerProtocol) -> list:
+        return [packet.from_json(c.args[0].decode('utf-8')) for c in p.sendMessage.call_args_list]
+
+    def _sent_actions(self, p: protocol.GameServerProtocol) -> list:
+        return [sent.action for sent in self._sent(p)]
+
+    def _logged_in(self, username: str = "alice") -> protocol.GameServerProtocol:
+        "Register and log in a player, with every packet that caused processed and the sent messages cleared"
+        p = self._protocol()
+        p.LOGIN(p, packet.RegisterPacket(username, "password", 1))
+        p.LOGIN(p, packet.LoginPacket(username, "password"))
+        self.assertEqual(p._state, p.PLAY)
+        while p._world_sync or not p._packet_queue.empty():
+            p.tick()
+        p.sendMessage.reset_mock()
+        return p
@@ -0,0 +1,59 @@
+import tempfile
+
+import journal
+from django.test import TransactionTestCase
+from server import models
+
+
+class WorldJournalRecoveryTest(TransactionTestCase):
+    def setUp(self):
+        self._dir = tempfile.TemporaryDirectory()
+        entity = models.Entity.objects.create(name="test")
+        self.ids = [models.InstancedEntity.objects.create(entity=entity, x=0, y=0).id for _ in range(3)]
+
+    def tearDown(self):
+        self._dir.cleanup()
+
+    def _position(self, i: int) -> list:
+        ientity = models.InstancedEntity.objects.get(id=self.ids[i])
+        return [ientity.x, ientity.y]
+
+    def _crash_after_snapshot_and_tail(self):
+        "Snapshot two positions, journal a tail that moves one of them, then crash mid-write"
+        writer = journal.WorldJournal(self._dir.name)
+        writer.recover()
+        writer.record_position(self.ids[0], 10, 10)
+        writer.record_position(self.ids[1], 20, 20)
+        writer.snapshot()
+        writer.record_position(self.ids[1], 25, 25)
+        writer._file.write(f'{{"id":{self.ids[2]},"x":3'.encode('utf-8'))
+        writer._file.close()
+
+    def test_recover_replays_snapshot_and_tail_up_to_torn_record(self):
+        self._crash_after_snapshot_and_tail()
+
+        recovered = journal.WorldJournal(self._dir.name)
+        positions = recovered.recover()
+        recovered._file.close()
+
+        self.assertEqual(positions, {str(self.ids[0]): [10, 10], str(self.ids[1]): [25, 25]})
+
+    def test_snapshot_compacts_before_truncating(self):
+        self._crash_after_snapshot_and_tail()
+
+        self.assertEqual(self._position(0), [10, 10])
+        self.assertEqual(self._position(1), [20, 20])
+
+    def test_compact_writes_only_tail_records(self):
+        self._crash_after_snapshot_and_tail()
+        # Anything compact() writes for the snapshot's positions would show up over these
+        models.InstancedEntity.objects.update(x=-1, y=-1)
+
+        recovered = journal.WorldJournal(self._dir.name)
+        recovered.recover()
+        recovered.compact()
+        recovered._file.close()
+
+        self.assertEqual(self._position(0), [-1, -1])
+        self.assertEqual(self._position(1), [25, 25])
+        self.assertEqual(self._position(2), [-1, -1])
@@ -0,0 +1,18 @@
+from protocol_case import ProtocolTestCase
+from server import packet
+
+
+class LoginTest(ProtocolTestCase):
+    def test_broadcasts_are_not_queued_before_login(self):
+        bob = self._logged_in("bob")
+        alice = self._protocol()
+        alice.LOGIN(alice, packet.RegisterPacket("alice", "password", 1))
+
+        for _ in range(100):
+            bob.broadcast(packet.ChatPacket("bob", "hello"), exclude_self=True)
+        self.assertTrue(alice._packet_queue.empty())
+
+        # So an admitted login is the next thing processed
+        alice.onPacket(alice, packet.LoginPacket("alice", "password"), admitted=True)
+        alice.tick()
+        self.assertEqual(alice._state, alice.PLAY)
@@ -0,0 +1,42 @@
+import math
+import pathfinding
+from protocol_case import ProtocolTestCase
+from server import models
+from server import packet
+
+
+class MovementTest(ProtocolTestCase):
+    def setUp(self):
+        super().setUp()
+        # A two cell corridor, with the player starting at (0, 0)
+        self.factory.collision_grid = pathfinding.CollisionGrid({(0, 0), (1, 0)}, 64)
+
+    def test_reachable_target_starts_a_move(self):
+        p = self._logged_in()
+        p.PLAY(p, packet.TargetPacket(100, 32))
+        p.tick()  # Our own broadcast Move is forwarded to our client
+
+        move = self._sent(p)[-1]
+        self.assertEqual(move.action, packet.Action.Move)
+        self.assertEqual(move.payloads[3:5], (100, 32))
+
+    def test_unreachable_target_corrects_our_client(self):
+        p = self._logged_in()
+        p.PLAY(p, packet.TargetPacket(500, 500))
+
+        correction = self._sent(p)[-1]
+        self.assertEqual(correction.action, packet.Action.ModelDelta)
+        self.assertEqual(correction.payloads[0]["instanced_entity"]["x"], 0)
+        self.assertEqual(correction.payloads[0]["instanced_entity"]["y"], 0)
+        self.assertIsNone(p._player_target)
+
+    def test_disconnect_mid_move_keeps_caught_up_position(self):
+        p = self._logged_in()
+        p.PLAY(p, packet.TargetPacket(100, 32))
+        p._move_start_time -= 1  # One second into the move
+        p.onClose(True, 1000, "")
+
+        self.factory.journal.compact()
+        ientity = models.InstancedEntity.objects.get(id=p._actor.instanced_entity.id)
+        self.assertEqual((ientity.x, ientity.y), (p._actor.instanced_entity.x, p._actor.instanced_entity.y))
+        self.assertAlmostEqual(ientity.x, 100 * p._speed / math.dist((0, 0), (100, 32)), places=1)
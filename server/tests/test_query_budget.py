@@ -0,0 +1,87 @@
+import protocol
+from protocol_case import ProtocolTestCase
+from querybudget import query_budget, QueryBudgetExceeded
+from server import models
+from server import packet
+
+
+class QueryBudgetTest(ProtocolTestCase):
+    """
+    Runs each packet handler inside its query budget, with several world items and inventory entries,
+    so a handler that starts querying per item fails here.
+    """
+
+    def setUp(self):
+        super().setUp()
+        sword = models.Item.objects.create(name="Iron Sword", description="A sturdy iron sword", item_type="weapon")
+        potion = models.Item.objects.create(name="Health Potion", description="Restores health", item_type="potion")
+        self.items = [sword, potion]
+        for i in range(5):
+            models.WorldItem.objects.create(item=self.items[i % 2], x=100 + i, y=150)
+
+    def _logged_in(self, username: str = "alice") -> protocol.GameServerProtocol:
+        p = super()._logged_in(username)
+        for item in self.items:
+            models.Inventory.objects.create(actor=p._actor, item=item, quantity=2)
+        p.sendMessage.reset_mock()
+        return p
+
+    def test_register(self):
+        p = self._protocol()
+        with query_budget("Register"):
+            p.LOGIN(p, packet.RegisterPacket("alice", "password", 1))
+        self.assertEqual(self._sent_actions(p), [packet.Action.Ok])
+        self.assertTrue(models.Actor.objects.filter(user__username="alice").exists())
+
+    def test_register_rolls_back_and_removes_cognito_user(self):
+        models.User.objects.create(username="alice", cognito_user_id="alice")
+        p = self._protocol()
+        p._cognito_client.admin_delete_user.side_effect = Exception("Cognito unavailable")
+        p.LOGIN(p, packet.RegisterPacket("alice", "password", 1))
+
+        p._cognito_client.admin_delete_user.assert_called_once()
+        self.assertEqual(self._sent_actions(p), [packet.Action.Deny])
+        # The client hears about the database error, not the failed cleanup
+        deny = packet.from_json(p.sendMessage.call_args.args[0].decode('utf-8'))
+        self.assertIn("UNIQUE", deny.payloads[0])
+        self.assertFalse(models.Entity.objects.filter(name="alice").exists())
+
+    def test_login(self):
+        self._logged_in("bob")
+        p = self._protocol()
+        p.LOGIN(p, packet.RegisterPacket("alice", "password", 1))
+        with query_budget("Login"):
+            p.LOGIN(p, packet.LoginPacket("alice", "password"))
+            # Everything the login broadcasts and syncs must come from what was already loaded
+            p.tick()
+        self.assertEqual(p._state, p.PLAY)
+        self.assertEqual(self._sent_actions(p).count(packet.Action.ItemSpawn), 5)
+
+    def test_pickup(self):
+        p = self._logged_in()
+        new_item = models.Item.objects.create(name="Shield", description="Round", item_type="armour")
+        world_item = models.WorldItem.objects.create(item=new_item, x=10, y=10)
+        with query_budget("Pickup"):
+            p.PLAY(p, packet.PickupPacket(world_item.id))
+        self.assertIn(packet.Action.Inventory, self._sent_actions(p))
+        self.assertFalse(models.WorldItem.objects.filter(id=world_item.id).exists())
+
+    def test_inventory_request(self):
+        p = self._logged_in()
+        with query_budget("InventoryRequest"):
+            p.PLAY(p, packet.InventoryRequestPacket())
+        self.assertEqual(self._sent_actions(p), [packet.Action.Inventory])
+
+    def test_tick(self):
+        p = self._logged_in()
+        models.WorldItem.objects.all().delete()
+        p._last_item_spawn = 0
+        with query_budget("tick"):
+            p.tick()
+        self.assertEqual(models.WorldItem.objects.count(), 2)
+
+    def test_budget_exceeded(self):
+        with self.assertRaises(QueryBudgetExceeded):
+            with query_budget("InventoryRequest"):
+                list(models.Item.objects.all())
+                list(models.WorldItem.objects.all())